@@ -9,6 +9,16 @@ from typing import List
 from logger import logger
 from web import Client
 
+# Help page printed for the 'help' command.
+
+HELP = ("\n"
+        "stop                 | closes the client\n"
+        "help                 | returns this help page\n"
+        "sent <file> [<file>] | sends the files to the server\n"
+        "check <file or hash> | checks if the file is stored in the Blockchain\n"
+        "check                | checks the consistency of the Blockchain\n"
+        "get <hash>           | loads the file stored for the hash\n")
+
 
 class Terminal:
     """
@@ -36,32 +46,27 @@ class Terminal:
                 if command[0] == "stop":
                     break
                 if command[0] == "help":
-                    print("\n"
-                          "stop                 | closes the client\n"
-                          "help                 | returns this help page\n"
-                          "sent <file>           | sends the file to the server\n"
-                          "check <file or hash> | checks if the file is stored in the Blockchain\n"
-                          "check                | checks the consistency of the Blockchain\n"
-                          "get <hash>           | loads the file stored for the hash\n")
+                    print(HELP)
                     continue
-                if not commands.__contains__(command[0]):
+                handler = commands.get(command[0])
+                if handler is None:
                     logger.warning("Invalid command type 'help' for help!")
                 else:
-                    commands.get(command[0]).__call__(command)
+                    handler(command)
             except KeyboardInterrupt:
                 break
         self.client.close()
 
     def add_file(self, command: List[str]):
         """
-        Adds a new file to the server
+        Adds new files to the server. The files are loaded and sent one after another.
 
-        :param command: command that contains the file to send.
+        :param command: command that contains the files to send.
         """
-        if len(command) != 2:
-            logger.error("Command '" + command[0] + "' needs one second argument the filepath!")
+        if len(command) < 2:
+            logger.error(f"Command '{command[0]}' needs at least one filepath as argument!")
         else:
-            self.client.add_file(command[1])
+            self.client.add_files(command[1:])
 
     def check(self, command: List[str]):
         """
@@ -73,8 +78,8 @@ class Terminal:
             if len(command) == 1:
                 self.client.full_check()
             else:
-                logger.error("Command '" + command[
-                    0] + "' needs one second argument the filepath or file hash!")
+                logger.error(
+                    f"Command '{command[0]}' needs one second argument the filepath or file hash!")
         else:
             if os.path.isfile(command[1]):
                 self.client.check_file(command[1])
@@ -88,7 +93,7 @@ class Terminal:
         :param command: command that contains the hash to request.
         """
         if len(command) != 2:
-            logger.error("Command '" + command[0] + "' needs one second argument the file hash!")
+            logger.error(f"Command '{command[0]}' needs one second argument the file hash!")
         else:
             self.client.get_file(command[1])
 
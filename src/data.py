@@ -3,19 +3,35 @@ Module that holds the classes and functions needed for the BlockChain.
 """
 
 import hashlib
+import mmap
 import os
-import pickle
+import struct
 import threading
-import zlib
 
+from collections import OrderedDict
 from os import path
-from typing import List, Dict, Tuple, Set
-from exceptions import DuplicateBlockError, BlockSectionInconsistentError
+from typing import List, Dict, Tuple, Set, Optional, Iterable
+from exceptions import DuplicateBlockError, BlockSectionInconsistentError, \
+    IncompatibleStoreError, InvalidBlockError
 
 # Chunk size for the data a single Block is holding.
-# Size is defined by project specification.
+# Size is aligned to the common page size of 4 KiB.
 
-CHUNK_SIZE = 500
+CHUNK_SIZE = 4096
+
+# Header of a Block stored in the file system. Holds the index_all and ordinal of the Block
+# followed by the byte lengths of the hash, hash previous and filename.
+# The format is compiled once and not parsed again on every encode and decode.
+
+BLOCK_HEADER = struct.Struct("<IIHHH")
+
+# Number of locks used by the BlockChain to separate adding Blocks of different files.
+
+FILE_LOCK_STRIPES = 256
+
+# Number of Blocks the FileDictionary keeps in memory after reading or writing them.
+
+BLOCK_CACHE_SIZE = 1024
 
 
 # Disable too instance attributes. Attributes are needed to make them immutable.
@@ -23,8 +39,12 @@ CHUNK_SIZE = 500
 class Block:
     """
     Class that represents a Block in a BlockChain.
+    The attributes are stored in slots, a Block has no per instance __dict__.
     """
 
+    __slots__ = ("__hashcode", "__index_all", "__ordinal", "__filename", "__chunk",
+                 "__hash_previous", "__digest")
+
     # Disable too many arguments. Doesnt make much sense to group the variables instead.
     # pylint: disable=too-many-arguments
     def __init__(self, hashcode: str, index_all: int, ordinal: int, chunk: bytes, filename: str,
@@ -35,6 +55,11 @@ class Block:
         self.__filename = filename
         self.__chunk = chunk
         self.__hash_previous = hash_previous  # stored as a sha256 string
+        self.__digest = None  # hash of the Block, computed on first use
+
+    def __reduce__(self):
+        return Block, (self.hash, self.index_all, self.ordinal, self.chunk, self.filename,
+                       self.hash_previous)
 
     @staticmethod
     def set_previous(hash_previous: str, block):
@@ -43,8 +68,8 @@ class Block:
 
         :return: a new Block.
         """
-        return Block(hashcode=block.hash, index_all=block.index_all, ordinal=block.ordinal,
-                     filename=block.filename, chunk=block.chunk, hash_previous=hash_previous)
+        return Block(block.hash, block.index_all, block.ordinal, block.chunk, block.filename,
+                     hash_previous)
 
     @property
     def hash(self) -> str:
@@ -78,7 +103,7 @@ class Block:
     def chunk(self) -> bytes:
         """
         Property function to ensure that the chunk of data is a read only variable.
-        The byte data is stored as a Block.BUF_SIZE large chunk in the each Block.
+        The byte data is stored as a CHUNK_SIZE large chunk in each Block.
 
         :return: the chunk of data as bytes.
         """
@@ -101,18 +126,33 @@ class Block:
         """
         return self.__hash_previous
 
+    def digest(self) -> str:
+        """
+        Gets the sha256 hash of the Block. The hash is computed once from the binary layout
+        created by encode_block, a Block can not change afterwards.
+
+        :return: sha256 hash for the block.
+        """
+        if self.__digest is None:
+            self.__digest = hashlib.sha256(encode_block(self)).hexdigest()
+        return self.__digest
+
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Block):
             return False
-        return (self.hash == other.hash and
+
+        # the chunk is compared last, only blocks that match in every other field compare it
+        return (self.ordinal == other.ordinal and
                 self.index_all == other.index_all and
-                self.ordinal == other.ordinal and
-                self.chunk == other.chunk and
-                self.filename == other.filename)
+                self.hash == other.hash and
+                self.filename == other.filename and
+                self.chunk == other.chunk)
 
     def __hash__(self) -> int:
-        values = frozenset((self.hash, self.index_all, self.ordinal, self.chunk, self.filename))
-        return hash(values)
+        # the chunk is left out, blocks of a file are already told apart by their ordinal
+        return hash((self.hash, self.index_all, self.ordinal, self.filename))
 
 
 class BlockChain:
@@ -124,77 +164,146 @@ class BlockChain:
     def __init__(self, in_memory: bool = True):
         self.__chain = MemoryDictionary() if in_memory else FileDictionary()
         self.__lock = threading.Lock()  # lock to ensures adding as an atomic operation
+        self.__file_locks = [threading.Lock() for _ in range(FILE_LOCK_STRIPES)]  # lock per file
+
+        # hashes of the stored Blocks by file hash and ordinal, avoids reloading the chain on add
+        self.__index: Dict[str, Dict[int, List[str]]] = {}
+        self.__verified: Dict[str, int] = {}  # number of Blocks of files that passed check_hash
+        self.__remember_checks = in_memory  # stored Block files can get lost or changed on disk
+        self.__build_index()
+
+    def __build_index(self):
+        """
+        Builds the index of stored Blocks by walking the chain once.
+        """
+        head = self.__chain.get_head()
+        block = self.__chain.get(head)
+        while block is not None:
+            if hash_block(block) != head:
+                break
+
+            self.__index_block(head, block)
+            head = block.hash_previous
+            block = self.__chain.get(head)
+
+    def __index_block(self, hashcode: str, block: Block):
+        """
+        Adds a stored Block to the index. The list of hashes is replaced instead of extended,
+        so threads reading the index never see a list that is modified.
+
+        :param hashcode: the hash the Block is stored with.
+        :param block: the stored Block.
+        """
+        ordinals = self.__index.setdefault(block.hash, {})
+        ordinals[block.ordinal] = ordinals.get(block.ordinal, []) + [hashcode]
+        self.__verified.pop(block.hash, None)  # a new Block of the file needs a new check
+
+    def __file_lock(self, hashcode: str) -> threading.Lock:
+        """
+        Gets the lock for the given file hash. Blocks of the same file always share a lock.
+
+        :param hashcode: the file hash to get the lock for.
+        :return: the lock for the file.
+        """
+        return self.__file_locks[hash(hashcode) % FILE_LOCK_STRIPES]
+
+    def __exists(self, block: Block) -> bool:
+        """
+        Checks if a Block equal to the given Block is stored in the BlockChain.
+        Only stored Blocks of the same file with the same ordinal can be equal.
 
-    def __get_blocks_for_hash(self, hashcode: str) -> List[Block]:
+        :param block: the block to check.
+        :return: if an equal Block is stored.
+        """
+        for hashcode in self.__index.get(block.hash, {}).get(block.ordinal, []):
+            if block == self.__chain.get(hashcode):
+                return True
+        return False
+
+    def __get_blocks_for_hash(self, hashcode: str, cached: bool = True) -> List[Block]:
         """
         Collects all blocks that correspond to the given file hash.
         Method performs a thread safe action on the BlockChain no explicit locking needed.
+        Only the Blocks listed in the index for the file hash are loaded.
 
         :param hashcode: the hashcode to collect blocks for.
+        :param cached: if the Blocks may be served from the cache of the storage.
         :return: list of blocks with given hash.
         """
-        head = self.__chain.get_head()  # thread safe get_head() is using a lock
-        if head is None:
+        ordinals = self.__index.get(hashcode)
+        if not ordinals:
             return []
-        block = self.__chain.get(head)  # thread safe block can only be read
-        blocks = []
 
-        while block is not None:
-            if hash_block(block) != head:
-                break
-
-            if block.hash == hashcode:
-                blocks.append(block)
-
-                if block.index_all == len(blocks):
-                    break
-
-            head = block.hash_previous
-            block = self.__chain.get(head)  # thread safe block can only be read
+        blocks = []
+        for hashcodes in list(ordinals.values()):  # copied, Blocks may be added concurrently
+            for block_hash in hashcodes:
+                block = self.__chain.get(block_hash, cached)  # thread safe block can only be read
+                if block is not None:
+                    blocks.append(block)
         return blocks
 
     def check_hash(self, hashcode: str) -> Tuple[bool, int]:
         """
         Checks if the given hash representing a file exists in the BlockChain.
-        Method performs a thread safe action on the BlockChain no explicit locking needed.
+        Method performs a thread safe action on the BlockChain by acquiring the lock of the file.
+        For a BlockChain in memory the result of a valid file is kept until a Block of the file
+        is added, so the file is not hashed again by every check. A BlockChain stored in the
+        filesystem reads the Blocks bypassing any cache on every check, so changed or lost Block
+        files are detected.
 
         :param hashcode: the hashcode to check
         :return: if the blocks for the file hash exists and how many block are stored for that file.
         """
+        num = self.__verified.get(hashcode)
+        if num is not None:
+            return True, num
 
-        blocks = self.__get_blocks_for_hash(hashcode)
-        try:
-            return generate_file_hash(blocks) == hashcode, len(blocks)
-        except BlockSectionInconsistentError:
-            return False, 0
+        # holding the file lock, no Block of the file can be added while it is checked
+        with self.__file_lock(hashcode):
+            blocks = self.__get_blocks_for_hash(hashcode, cached=False)
+            try:
+                valid = generate_file_hash(blocks) == hashcode
+            except BlockSectionInconsistentError:
+                return False, 0
+
+            if valid and self.__remember_checks:
+                self.__verified[hashcode] = len(blocks)
+            return valid, len(blocks)
 
     def check(self) -> Tuple[bool, int]:
         """
         Checks the full blockchain.
+        The chain is walked once to collect the hashes the Blocks of each file are stored with.
+        Afterwards the files are validated one after another, so only the Blocks of a single
+        file are held in memory at once. The Blocks are read bypassing any cache, so changed or
+        lost Blocks are detected.
 
         :return: if blockchain is valid and how many files are stored
         """
-        file_hashes: Set[str] = set()
+        files: Dict[str, List[str]] = {}  # stored hashes of the blocks of each file
         head = self.__chain.get_head()
         if head is None:
             return True, 0
-        block = self.__chain.get(head)
+        block = self.__chain.get(head, cached=False)
         while block is not None:
             if hash_block(block) != head:
                 return False, 0
 
-            file_hashes.add(block.hash)
+            files.setdefault(block.hash, []).append(head)
             head = block.hash_previous
-            block = self.__chain.get(block.hash_previous)
+            block = self.__chain.get(block.hash_previous, cached=False)
 
         if head is not None:
             return False, 0
 
         chain_valid = True
-        for hashcode in file_hashes:
-            valid, _ = self.check_hash(hashcode)
-            chain_valid &= valid
-        return chain_valid, len(file_hashes)
+        for hashcode, block_hashes in files.items():
+            blocks = [self.__chain.get(block_hash, cached=False) for block_hash in block_hashes]
+            try:
+                chain_valid &= None not in blocks and generate_file_hash(blocks) == hashcode
+            except BlockSectionInconsistentError:
+                chain_valid = False
+        return chain_valid, len(files)
 
     def size(self):
         """
@@ -204,33 +313,89 @@ class BlockChain:
         """
         return self.__chain.size()
 
+    def close(self):
+        """
+        Releases the resources held by the storage of the BlockChain. The BlockChain must not
+        be used afterwards.
+        """
+        self.__chain.close()
+
     def add(self, new_block: Block) -> str:
         """
         Adds a new Block to the BlockChain.
-        Method performs a thread safe action on the BlockChain by acquiring a lock.
+        Method performs a thread safe action on the BlockChain by acquiring the lock of the
+        file the Block belongs to and the lock of the chain.
 
         Creates a new section of Blocks for a new file or add a Block to an existing
         Block section in the BlockChain.
 
         :param new_block: the block to insert into the BlockChain.
         :raise DuplicateBlockError: if block already exists.
+        :raise InvalidBlockError: if the block can not be encoded, the block is not added.
         """
 
-        with self.__lock:  # ensures atomic operation
-            head = self.__chain.get_head()  # thread safe get_head() is using a lock
-            new_block = Block.set_previous(head, new_block)
-
-            block = self.__chain.get(head)
-            while block is not None:
-                if block.__eq__(new_block):
-                    raise DuplicateBlockError("Block already exists!")
+        # Blocks of the same file always map to the same file lock. While holding it no other
+        # thread can add a Block equal to the new one, so the duplicate check can run outside
+        # of the chain lock and only linking the Block to the head needs to be serialized.
+        with self.__file_lock(new_block.hash):
+            if self.__exists(new_block):
+                raise DuplicateBlockError("Block already exists!")
 
-                block = self.__chain.get(block.hash_previous)  # thread safe block can only be read
+            with self.__lock:  # ensures atomic operation
+                head = self.__chain.get_head()  # thread safe get_head() is using a lock
+                hashcode = self.__chain.add(Block.set_previous(head, new_block))
+                self.__chain.update_head(hashcode)  # thread safe update_head() is using a lock
 
-            hashcode = self.__chain.add(new_block)
-            self.__chain.update_head(hashcode)  # thread safe update_head() is using a lock
+            self.__index_block(hashcode, new_block)
             return hashcode
 
+    def add_many(self, new_blocks: List[Block]) -> List[Optional[str]]:
+        """
+        Adds multiple Blocks to the BlockChain.
+        Method performs a thread safe action on the BlockChain by acquiring the lock of each
+        file and the lock of the chain once per file instead of once per Block.
+
+        Blocks that already exist are skipped.
+
+        :param new_blocks: the blocks to insert into the BlockChain.
+        :return: the hashes the Blocks are stored with in the order of the given Blocks. The
+        hash is None for a Block that already exists.
+        :raise InvalidBlockError: if a Block can not be encoded. No Block of its file is added,
+        Blocks of other files that came before it may already be added.
+        """
+        hashcodes: List[Optional[str]] = [None] * len(new_blocks)
+        files: Dict[str, List[int]] = {}  # positions of the Blocks of each file
+        for position, block in enumerate(new_blocks):
+            files.setdefault(block.hash, []).append(position)
+
+        for file_hash, positions in files.items():
+            with self.__file_lock(file_hash):
+                unique: Set[Block] = set()  # Blocks of the file that are not stored yet
+                added: List[int] = []
+                for position in positions:
+                    block = new_blocks[position]
+                    if block not in unique and not self.__exists(block):
+                        unique.add(block)
+                        added.append(position)
+                if not added:
+                    continue
+
+                with self.__lock:  # ensures atomic operation
+                    head = self.__chain.get_head()  # thread safe get_head() is using a lock
+                    linked = []
+                    for position in added:
+                        linked.append(Block.set_previous(head, new_blocks[position]))
+                        head = hash_block(linked[-1])
+                    added_hashcodes = self.__chain.add_many(linked)
+                    self.__chain.update_head(head)  # thread safe update_head() is using a lock
+
+                for position, hashcode in zip(added, added_hashcodes):
+                    hashcodes[position] = hashcode
+
+                for position in added:
+                    self.__index_block(hashcodes[position], new_blocks[position])
+        return hashcodes
+
     def get(self, hashcode: str) -> List[Block]:
         """
         Gets the Blocks from the BlockChain with given hashcode.
@@ -247,10 +412,11 @@ class BlockChain:
 class MemoryDictionary:
     """
     Class that stores the BlockChain in a Dict.
+    The head is read and written without a lock. Reading and assigning an attribute is atomic
+    and writers are already serialized by the BlockChain.
     """
 
     def __init__(self):
-        self.__head_lock = threading.Lock()  # lock to ensures read write head is thread safe
         self.__map: Dict[str, Block] = {}
         self.__head = None
 
@@ -260,8 +426,7 @@ class MemoryDictionary:
 
         :return: the head or current 'hash previous', returns None if head does not exists.
         """
-        with self.__head_lock:
-            return self.__head
+        return self.__head
 
     def update_head(self, hashcode: str):
         """
@@ -269,8 +434,7 @@ class MemoryDictionary:
 
         :param hashcode: hash to update head with.
         """
-        with self.__head_lock:
-            self.__head = hashcode
+        self.__head = hashcode
 
     def size(self):
         """
@@ -280,6 +444,11 @@ class MemoryDictionary:
         """
         return len(self.__map)
 
+    def close(self):
+        """
+        Nothing to release, the map is only held in memory.
+        """
+
     def contains(self, block: Block) -> bool:
         """
         Checks if the given hashcode of the block exists.
@@ -288,22 +457,23 @@ class MemoryDictionary:
         :return: if the block is part of the BlockChain.
         """
         hashcode = hash_block(block)
-        return self.__map.__contains__(hashcode)
+        return hashcode in self.__map
 
-    def get(self, hashcode: str):
+    # Disable unused argument. The argument is needed to match the FileDictionary.
+    # pylint: disable=unused-argument
+    def get(self, hashcode: str, cached: bool = True):
         """
         Load the block stored for the hash.
 
         :param hashcode: hashcode to load Block for.
+        :param cached: unused, the map has no separate cache.
         :return: the Block saved under the given hashcode. Returns None if hashcode is None or
         the hashcode does not exists in the map.
         """
         if not hashcode:
             return None
 
-        if self.__map.__contains__(hashcode):
-            return self.__map.get(hashcode)
-        return None
+        return self.__map.get(hashcode)
 
     def add(self, block: Block) -> str:
         """
@@ -315,6 +485,15 @@ class MemoryDictionary:
         self.__map[hashcode] = block
         return hashcode
 
+    def add_many(self, blocks: List[Block]) -> List[str]:
+        """
+        Stores the given Blocks in the map.
+
+        :param blocks: the blocks to save.
+        :return: the hashes the Blocks are stored with.
+        """
+        return [self.add(block) for block in blocks]
+
 
 class FileDictionary:
     """
@@ -326,23 +505,81 @@ class FileDictionary:
 
     /.blockchain
     +-- /4c
-        +-- /19f36a2221b34b4837b05a72bbf21f1ca65d61aca1c221dd41e77979a08d73
+        +-- /19
+            +-- /f36a2221b34b4837b05a72bbf21f1ca65d61aca1c221dd41e77979a08d73
 
-    Where the file names 19f36a2221b34b4837b05a72bbf21f1ca65d61aca1c221dd41e77979a08d73 contains
-    all Blocks of the stored file.
+    Where the file names f36a2221b34b4837b05a72bbf21f1ca65d61aca1c221dd41e77979a08d73 contains
+    the Block in the binary layout created by encode_block. The two directory levels keep every
+    single directory small, even if a lot of Blocks are stored.
 
-    The last Block added to the BLockChain is saved in a file 'head'. If there is no file called
-    'head' in the folder /.blockchain there is no data inside the BlockChain.
+    The last Block added to the BLockChain is saved in a file 'head'. If the file 'head' in the
+    folder /.blockchain is empty or does not exist there is no data inside the BlockChain.
     """
 
     def __init__(self):
         self.root = os.getcwd() + "/.blockchain"
         self.__head_lock = threading.Lock()  # lock to ensures read write head is thread safe
+        self.__dirs: Set[str] = set()  # directories known to exist, saves a syscall per add
 
         # creating root dir if not exists
-        if not path.exists(self.root):
-            os.mkdir(self.root)
+        os.makedirs(self.root, exist_ok=True)
         self.head = self.root + "/head"
+        self.__root_prefix = self.root + "/"  # precomputed prefix of every block path
+
+        # the head is read once and kept in memory, the file is only written on updates
+        self.__head = None
+        if path.isfile(self.head):
+            with open(self.head, "r", encoding="utf-8") as file:
+                self.__head = file.readline() or None
+        self.__validate_head()
+
+        # the head file stays open, updates overwrite it in place without reopening it
+        self.__head_descriptor = os.open(self.head, os.O_WRONLY | os.O_CREAT, 0o644)
+
+        # least recently used Blocks, Blocks are immutable so cached entries never get stale
+        self.__cache: OrderedDict = OrderedDict()
+        self.__cache_lock = threading.Lock()  # lock to ensures read write cache is thread safe
+
+        # the stored Blocks are counted once, afterwards the count is kept up to date by add
+        self.__size_lock = threading.Lock()  # lock to ensures read write size is thread safe
+        self.__size = self.__count_blocks()
+
+    def __cache_blocks(self, pairs: Iterable[Tuple[str, Block]]):
+        """
+        Puts the Blocks into the cache and evicts the least recently used Blocks if the cache
+        is full. The cache lock is taken once for all Blocks.
+
+        :param pairs: the hashes the Blocks are stored with and the Blocks to cache.
+        """
+        with self.__cache_lock:
+            for hashcode, block in pairs:
+                self.__cache[hashcode] = block
+                self.__cache.move_to_end(hashcode)
+            while len(self.__cache) > BLOCK_CACHE_SIZE:
+                self.__cache.popitem(last=False)
+
+    def __validate_head(self):
+        """
+        Checks that the Block the head points to can be read. A store written with an older
+        layout, encoding or hash of the Blocks can not be resolved and is rejected, instead of
+        failing later on with a broken chain.
+
+        :raise IncompatibleStoreError: if the Block of the head is missing or can not be read.
+        """
+        if self.__head is None:
+            return
+
+        try:
+            with open(self.__get_path(self.__head), "rb", buffering=0) as file:
+                valid = hash_block(decode_block(file.readall())) == self.__head
+        except (OSError, ValueError, struct.error):
+            valid = False
+
+        if not valid:
+            raise IncompatibleStoreError(f"The head '{self.__head}' of the BlockChain stored in "
+                                         f"'{self.root}' can not be resolved! The store was "
+                                         f"written by an incompatible version, delete it to "
+                                         f"start a new BlockChain.")
 
     def __get_path(self, hashcode: str) -> str:
         """
@@ -351,7 +588,7 @@ class FileDictionary:
         :param hashcode: the hash value to get the path for.
         :return: the path for the given file hash.
         """
-        return self.root + "/" + hashcode[:2] + "/" + hashcode[2:]
+        return f"{self.__root_prefix}{hashcode[:2]}/{hashcode[2:4]}/{hashcode[4:]}"
 
     def __create_dir_if_not_exists(self, hashcode: str):
         """
@@ -359,28 +596,54 @@ class FileDictionary:
 
         :param hashcode: the file hash
         """
-        if not path.isdir(self.root + "/" + hashcode[:2]):
-            os.mkdir(self.root + "/" + hashcode[:2])
+        prefix = hashcode[:4]
+        if prefix in self.__dirs:
+            return
+
+        # concurrent calls may both create the directory, exist_ok makes this harmless
+        os.makedirs(f"{self.__root_prefix}{prefix[:2]}/{prefix[2:]}", exist_ok=True)
+        self.__dirs.add(prefix)
+
+    def __count_blocks(self) -> int:
+        """
+        Counts the Block files stored in the directories below the root. Temporary files of
+        writes that did not finish are not counted. The directories found are remembered, so
+        they are not created again.
+
+        :return: the number of stored Blocks.
+        """
+        count = 0
+        with os.scandir(self.root) as first_level:
+            for first in first_level:
+                if not first.is_dir():
+                    continue
+                with os.scandir(first.path) as second_level:
+                    for second in second_level:
+                        if not second.is_dir():
+                            continue
+                        self.__dirs.add(first.name + second.name)
+                        with os.scandir(second.path) as entries:
+                            count += sum(1 for entry in entries
+                                         if entry.is_file() and not entry.name.endswith(".tmp"))
+        return count
 
     def size(self):
         """
-        Gets the number of files stored.
+        Gets the number of Blocks stored.
 
-        :return size of files.
+        :return size of blocks.
         """
-        return len([name for name in os.listdir(self.root) if os.path.isfile(name)])
+        with self.__size_lock:
+            return self.__size
 
     def get_head(self):
         """
         Reading the last hash previous.
 
-        :return: the head or current 'hash previous', returns None if file does not exists.
+        :return: the head or current 'hash previous', returns None if head does not exists.
         """
         with self.__head_lock:
-            if not path.isfile(self.head):
-                return None
-            with open(self.head, "r", encoding="utf-8") as file:
-                return file.readline()
+            return self.__head
 
     def update_head(self, hashcode: str):
         """
@@ -389,8 +652,19 @@ class FileDictionary:
         :param hashcode: hash to update head with.
         """
         with self.__head_lock:
-            with open(self.head, "w", encoding="utf-8") as file:
-                file.write(hashcode)
+            # block hashes have a fixed length, so the new head always replaces the old one
+            os.lseek(self.__head_descriptor, 0, os.SEEK_SET)
+            os.write(self.__head_descriptor, hashcode.encode("utf-8"))
+            self.__head = hashcode
+
+    def close(self):
+        """
+        Closes the head file. Calling close more than once has no effect.
+        """
+        with self.__head_lock:
+            if self.__head_descriptor is not None:
+                os.close(self.__head_descriptor)
+                self.__head_descriptor = None
 
     def contains(self, block: Block) -> bool:
         """
@@ -402,115 +676,204 @@ class FileDictionary:
         hashcode = hash_block(block)
         return path.isfile(self.__get_path(hashcode))
 
-    def get(self, hashcode: str):
+    def get(self, hashcode: str, cached: bool = True):
         """
         Load the block stored for the hash.
-        Decompresses the byte array stored to the file with zlib.
+        Returns the cached Block or decodes the binary layout stored to the file with
+        decode_block.
 
         :param hashcode: hashcode to load Blocks for.
+        :param cached: if the cache is used. Without the cache the Block is always read from
+        its file and the Block read is not cached.
         :return: the Block saved under the given hashcode. Returns None if hashcode is None or
         the file for the hashcode does not exists.
         """
         if not hashcode:
             return None
 
-        filepath = self.__get_path(hashcode)
-        if path.isfile(filepath):
-            with open(filepath, "rb") as file:
-                data = file.read()
-                return pickle.loads(zlib.decompress(data))
-        return None
+        if cached:
+            with self.__cache_lock:
+                block = self.__cache.get(hashcode)
+                if block is not None:
+                    self.__cache.move_to_end(hashcode)
+                    return block
 
-    def add(self, block: Block) -> str:
+        # reading unbuffered in a single call, a missing file is detected by open itself
+        try:
+            with open(self.__get_path(hashcode), "rb", buffering=0) as file:
+                block = decode_block(file.readall())
+        except FileNotFoundError:
+            return None
+
+        if cached:
+            self.__cache_blocks(((hashcode, block),))
+        return block
+
+    def __write(self, block: Block) -> str:
         """
-        Stores the given Block back to the file. Compresses the byte array stored to the file
-        with zlib.
+        Writes the given Block to its file. The Block is written in the binary layout
+        created by encode_block with a single write to a temporary file that then replaces the
+        block file, so a Block is never stored partially.
 
-        :param block: the block to save.
+        :param block: the block to write.
+        :return: the hash the Block is stored with.
         """
         hashcode = hash_block(block)
         self.__create_dir_if_not_exists(hashcode)
 
+        # writing to a temporary file first, the block file appears atomically with os.replace
         filepath = self.__get_path(hashcode)
-        with open(filepath, "wb") as file:
-            data = pickle.dumps(block)
-            file.write(zlib.compress(data))
-            return hashcode
+        temp_filepath = f"{filepath}.tmp"
+        descriptor = os.open(temp_filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(descriptor, encode_block(block))
+        finally:
+            os.close(descriptor)
+        os.replace(temp_filepath, filepath)
+        return hashcode
+
+    def add(self, block: Block) -> str:
+        """
+        Stores the given Block back to the file.
+
+        :param block: the block to save.
+        :return: the hash the Block is stored with.
+        """
+        hashcode = self.__write(block)
+        with self.__size_lock:
+            self.__size += 1  # the BlockChain never stores the same Block twice
+
+        self.__cache_blocks(((hashcode, block),))
+        return hashcode
+
+    def add_many(self, blocks: List[Block]) -> List[str]:
+        """
+        Stores the given Blocks to their files. The size and the cache locks are taken once for
+        all Blocks instead of once per Block.
+
+        :param blocks: the blocks to save.
+        :return: the hashes the Blocks are stored with.
+        """
+        hashcodes = [self.__write(block) for block in blocks]
+        with self.__size_lock:
+            self.__size += len(blocks)  # the BlockChain never stores the same Block twice
+
+        self.__cache_blocks(zip(hashcodes, blocks))
+        return hashcodes
+
+
+def encode_block(block: Block) -> bytes:
+    """
+    Encodes the given block into a flat binary layout. The layout consists of a fixed size header
+    followed by the hash, hash previous and filename as utf-8 strings and the raw chunk bytes.
+
+    :param block: the block to encode.
+    :return: the encoded block as bytes.
+    :raise InvalidBlockError: if a field of the block does not fit into the header.
+    """
+    hashcode = block.hash.encode("utf-8")
+    hash_previous = block.hash_previous.encode("utf-8") if block.hash_previous else b''
+    filename = block.filename.encode("utf-8")
+    try:
+        header = BLOCK_HEADER.pack(block.index_all, block.ordinal, len(hashcode),
+                                   len(hash_previous), len(filename))
+    except struct.error as error:
+        raise InvalidBlockError(f"Block with ordinal '{block.ordinal}' of '{block.index_all}' "
+                                f"can not be encoded: {error}") from error
+    return b"".join((header, hashcode, hash_previous, filename, block.chunk))
+
+
+def decode_block(data: bytes) -> Block:
+    """
+    Decodes a block from the binary layout created by encode_block.
+
+    :param data: the encoded block.
+    :return: the decoded Block.
+    """
+    index_all, ordinal, hash_len, previous_len, filename_len = BLOCK_HEADER.unpack_from(data)
+    offset = BLOCK_HEADER.size
+    hashcode = data[offset:offset + hash_len].decode("utf-8")
+    offset += hash_len
+    hash_previous = data[offset:offset + previous_len].decode("utf-8") or None
+    offset += previous_len
+    filename = data[offset:offset + filename_len].decode("utf-8")
+    offset += filename_len
+    return Block(hashcode, index_all, ordinal, data[offset:], filename, hash_previous)
 
 
 def hash_block(block: Block) -> str:
     """
     Creating a sha256 hash for the given block.
-    Dumps the pickle byte array of the object into a hash value.
+    Hashes the binary layout created by encode_block. Every variable length field is prefixed
+    by its length in the layout, so different blocks never hash the same bytes. The hash is
+    cached by the Block, walking the chain again does not hash the Blocks again.
 
     :param block: to generate hash for.
     :return: sha256 hash for the block.
     """
-    sha256 = hashlib.sha256()
-    sha256.update(pickle.dumps(block))
-    return sha256.hexdigest()
+    return block.digest()
 
 
 def generate_file_hash(blocks: List) -> str:
     """
     Generates sha256 hash for given block list. If there is an error within the blocks no hash
-    will be generated.
+    will be generated. The blocks are validated in a single pass and their chunks are hashed
+    in the order of their ordinals, the given list is not modified.
 
     :param blocks: the blocks of a file to generate the hash for.
     :raise BlockSectionInconsistentError: if there are no blocks to create a hash for, if there
     is a duplicate block identified by its ordinal, if the blocks contain different data regarding
-    the filename or the index_all.
+    the filename or the index_all or if not every block of the file is given.
     :return: sha256 hash for the file.
     """
     if not blocks:
         raise BlockSectionInconsistentError("No Blocks to create hash from!")
 
-    # check if each block is unique
-    if len({block.ordinal for block in blocks}) != len(blocks):
-        raise BlockSectionInconsistentError("Duplicate block in section!")
-
-    # check if information shared by the blocks is consistent
-    hashcode = blocks[0].hash
-    index_all = blocks[0].index_all
-    filename = blocks[0].filename
-
+    first = blocks[0]
+    chunks: Dict[int, bytes] = {}
     for block in blocks:
-        if hashcode != block.hash or index_all != block.index_all or filename != block.filename:
+        # check if each block is unique
+        if block.ordinal in chunks:
+            raise BlockSectionInconsistentError("Duplicate block in section!")
+
+        # check if information shared by the blocks is consistent
+        if (block.hash != first.hash or block.index_all != first.index_all
+                or block.filename != first.filename):
             raise BlockSectionInconsistentError("Inconsistent blocks!")
+        chunks[block.ordinal] = block.chunk
 
-    # sort blocks in order to always generate the correct hash
-    blocks.sort(key=lambda x: x.ordinal)
+    # check if every block of the file is given, ordinals are unique so none can be missing
+    if len(chunks) != first.index_all:
+        raise BlockSectionInconsistentError("Incomplete blocks!")
+    try:
+        data = b"".join([chunks[ordinal] for ordinal in range(first.index_all)])
+    except KeyError as error:
+        raise BlockSectionInconsistentError("Invalid block ordinal!") from error
 
-    # generate sha256 hash with python hashlib
-    sha256 = hashlib.sha256()
-    for block in blocks:
-        sha256.update(block.chunk)
-    return sha256.hexdigest()
+    # generate sha256 hash with python hashlib in a single call over the joined chunks
+    return hashlib.sha256(data).hexdigest()
 
 
 def load_file(filepath: str) -> List[Block]:
     """
-    Reading a file and converts it to a Block list by reading the file chunk by chunk.
+    Reading a file and converts it to a Block list by mapping the file into memory and
+    slicing it into chunks. The file is hashed in a single call over the mapped memory.
 
     :param filepath: filepath for the file to read.
-    :return: list of BlockCMD objects for transport.
+    :return: list of Block objects for transport. The list is empty for an empty file.
     """
     filename: str = os.path.split(filepath)[1]
-    chunks: List[bytes] = []
-    sha256 = hashlib.sha256()
 
-    # reading the file in binary mode
+    # mapping the file read only, slicing the mapping copies each chunk only once
     with open(filepath, "rb") as file:
-        while True:
-            chunk = file.read(CHUNK_SIZE)
-            if not chunk:
-                break
-            chunks.append(chunk)
-            sha256.update(chunk)
-    index_all = len(chunks)
-    hashcode = sha256.hexdigest()
-
-    blocks = []
-    for ordinal, chunk in enumerate(chunks):
-        blocks.append(Block(hashcode, index_all, ordinal, chunk, filename))
-    return blocks
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return []  # an empty file can not be mapped
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            index_all = (size + CHUNK_SIZE - 1) // CHUNK_SIZE
+            hashcode = hashlib.sha256(data).hexdigest()
+
+            return [Block(hashcode, index_all, ordinal,
+                          data[ordinal * CHUNK_SIZE:(ordinal + 1) * CHUNK_SIZE], filename)
+                    for ordinal in range(index_all)]
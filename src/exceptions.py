@@ -15,6 +15,18 @@ class BlockSectionInconsistentError(Exception):
     """
 
 
+class InvalidBlockError(Exception):
+    """
+    Raised when a Block can not be encoded to its binary layout.
+    """
+
+
+class IncompatibleStoreError(Exception):
+    """
+    Raised when a BlockChain stored in the filesystem can not be read.
+    """
+
+
 class PackageCreationError(Exception):
     """
     Raised when unable to create package.
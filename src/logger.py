@@ -3,7 +3,7 @@ Module that holds the classes and functions needed for the logger.
 """
 
 import threading
-from datetime import datetime
+import time
 
 from enum import Enum
 
@@ -50,17 +50,22 @@ class Logger:
     Class to log text to the console.
     """
 
-    @staticmethod
-    def __prefix(log_level: LogLevel):
-        now = datetime.now()
-        ctime = now.strftime("%Y-%m-%d %H:%M:%S")
+    def __init__(self):
+        # padded names of the log levels, created once instead of on every log
+        self.__names = {log_level: log_level.name.ljust(7) for log_level in LogLevel}
 
-        def spaces(max_n, string) -> str:
-            return " " * ((max_n - len(string)) if len(string) < max_n else 0)
+        # second and formatted time of the last log, the time is formatted once per second
+        self.__time = (0, "")
 
-        name = log_level.name + spaces(7, log_level.name)
-        thread = threading.current_thread().name + spaces(15, threading.current_thread().name)
-        return f"{ctime} [{name}] [{thread}]  "
+    def __prefix(self, log_level: LogLevel):
+        second, ctime = self.__time
+        now = int(time.time())
+        if now != second:
+            ctime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+            self.__time = (now, ctime)  # replaced as a whole, threads never see a mixed pair
+
+        thread = threading.current_thread().name.ljust(15)
+        return f"{ctime} [{self.__names[log_level]}] [{thread}]  "
 
     def __format_print(self, msg: str, log_level: LogLevel):
         print(self.__prefix(log_level) + msg)
@@ -8,6 +8,11 @@ from enum import IntEnum
 from exceptions import PackageCreationError, PackageHandleError
 from logger import LogResult, LogLevel, logger
 
+# Pickle protocol used for the payload of a package. Protocol 4 is the highest protocol
+# supported by python 3.7, so clients and servers on different python versions are compatible.
+
+PICKLE_PROTOCOL = 4
+
 
 class PackageMode(IntEnum):
     """
@@ -30,6 +35,7 @@ class PackageId(IntEnum):
     HASH_CHECK = 0x02  # send/receive hash to check
     FULL_CHECK = 0x03  # checks the blockchain
     GET_FILE = 0x04  # send/receive hash to get blocks of a file
+    SEND_BLOCKS = 0x05  # send/receive multiple blocks of files at once
 
 
 class Package:
@@ -115,7 +121,7 @@ class PackageFactory:
         """
         log_result = LogResult(log_level, message)
         logger.log(log_result)
-        return self.create_from_object(PackageId.LOG_TEXT, LogResult(log_level, message))
+        return self.create_from_object(PackageId.LOG_TEXT, log_result)
 
     def create_from_bytes(self, data: bytes):
         """
@@ -136,8 +142,8 @@ class PackageFactory:
         package_mode = 0x80 & header
         package_id = 0x7F & header
 
-        if not self.packages_ids.__contains__(package_id):
-            raise PackageCreationError("Package ID " + str(package_id) + "invalid!")
+        if package_id not in self.packages_ids:
+            raise PackageCreationError(f"Package ID {package_id} invalid!")
 
         return Package(package_mode, package_id, data[1:])
 
@@ -149,10 +155,11 @@ class PackageFactory:
         :param data: the object to send with this package.
         :return: a new package.
         """
-        if not self.packages_ids.__contains__(package_id):
-            raise PackageCreationError("Package ID " + str(package_id) + "invalid!")
+        if package_id not in self.packages_ids:
+            raise PackageCreationError(f"Package ID {package_id} invalid!")
 
-        return Package(self.package_mode, package_id, pickle.dumps(data) if data else b'')
+        payload = pickle.dumps(data, protocol=PICKLE_PROTOCOL) if data else b''
+        return Package(self.package_mode, package_id, payload)
 
 
 class PackageHandler:
@@ -197,9 +204,9 @@ class PackageHandler:
         if package.package_mode != self.__package_mode:
             raise PackageHandleError("Package is not meant to be handled by this package handler!")
 
-        if not self.__handlers.__contains__(package.package_id):
-            raise PackageHandleError("There is no handler installed to handle package id "
-                                     + str(package.package_id) + "!")
+        if package.package_id not in self.__handlers:
+            raise PackageHandleError(
+                f"There is no handler installed to handle package id {package.package_id}!")
 
         # calling the installed handler for the package.
         handler = self.__handlers.get(package.package_id)
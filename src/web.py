@@ -7,14 +7,24 @@ import threading
 from threading import Thread
 
 from contextlib import closing
-from typing import List, Tuple
-from data import BlockChain, load_file, generate_file_hash, Block
-from exceptions import DuplicateBlockError
+from typing import Iterable, List, Tuple, Optional
+from data import BlockChain, load_file, generate_file_hash, Block, CHUNK_SIZE
+from exceptions import DuplicateBlockError, InvalidBlockError
 from logger import logger, LogLevel
 from package import PackageFactory, PackageHandler, PackageMode, Package, PackageId
 
 MAX_PACKAGE_SIZE = 2  # 2 bytes or 0xFFFF or 65535
 
+# Room per Block for the pickled hashes, filename and ordinals next to its chunk.
+# A Block with a 255 character filename needs about 440 bytes.
+
+BLOCK_METADATA_SIZE = 1024
+
+# Number of Blocks sent in a single package, as many as fit into a package of the largest
+# size the MAX_PACKAGE_SIZE header can announce.
+
+BLOCKS_PER_PACKAGE = (2 ** (8 * MAX_PACKAGE_SIZE) - 1) // (CHUNK_SIZE + BLOCK_METADATA_SIZE)
+
 
 class Client:
     """
@@ -49,21 +59,20 @@ class Client:
         package = self.package_factory.create_from_object(package_id, hashcode)
         send(package, self.sock)
 
-    def __send_file(self, package_id: PackageId, blocks: List[Block]):
+    def __send_blocks(self, package_id: PackageId, blocks: List[Block]):
         """
-        Sends a file in form of blocks to the server with given package id.
+        Sends a file in form of blocks to the server with given package id. Each package holds
+        up to BLOCKS_PER_PACKAGE blocks of the file. The packages are created and sent one after
+        another without waiting for the server in between.
 
-        :param package_id: package id for the package that will be send.
-        :param blocks: the blocks of a file to send.
+        :param package_id: package id for the packages that will be send.
+        :param blocks: the blocks of the file to send.
         """
-
-        length = len(blocks)
-
-        for i in range(length):
-            package = self.package_factory.create_from_object(package_id, blocks[i])
-            send(package, self.sock)
-        logger.info(
-            "Done sending " + str(len(blocks)) + " Block(s) file hash: '" + blocks[0].hash + "'")
+        packages = (self.package_factory.create_from_object(
+            package_id, blocks[i:i + BLOCKS_PER_PACKAGE])
+            for i in range(0, len(blocks), BLOCKS_PER_PACKAGE))
+        send_all(packages, self.sock)
+        logger.info(f"Done sending {len(blocks)} Block(s) file hash: '{blocks[0].hash}'")
 
     def __connect(self):
         """
@@ -82,8 +91,9 @@ class Client:
         Connect to the server. Starts the listener thread for the client.
         """
 
-        logger.info("Connecting to server " + str(self.host) + ":" + str(self.port))
+        logger.info(f"Connecting to server {self.host}:{self.port}")
         self.sock.connect((self.host, self.port))
+        set_socket_options(self.sock)
 
         self.thread = Thread(target=self.__connect, args=(), name="ClientThread")
         self.thread.start()
@@ -109,7 +119,7 @@ class Client:
 
         :param hashcode: the file hash to restore the file from.
         """
-        logger.info("Requesting file '" + hashcode + "'")
+        logger.info(f"Requesting file '{hashcode}'")
         self.__send_hash(PackageId.GET_FILE, hashcode)
 
     def check_hash(self, hashcode: str):
@@ -118,7 +128,7 @@ class Client:
 
         :param hashcode: to send to server and check.
         """
-        logger.info("Checking file '" + hashcode + "'")
+        logger.info(f"Checking file '{hashcode}'")
         self.__send_hash(PackageId.HASH_CHECK, hashcode)
 
     def check_file(self, filepath: str):
@@ -138,10 +148,25 @@ class Client:
 
         :param filepath: to the file to send to server.
         """
-        if os.path.isfile(filepath):
-            self.__send_file(PackageId.SEND_FILE, load_file(filepath))
-        else:
-            logger.error("The file '" + filepath + "' does not exist!")
+        self.add_files([filepath])
+
+    def add_files(self, filepaths: List[str]):
+        """
+        Loads the files by the given filepaths, splits them into chunks/blocks of data and sends
+        them to the server to store them. The files are loaded and sent one after another, so
+        only a single file is held in memory.
+
+        :param filepaths: to the files to send to server.
+        """
+        for filepath in filepaths:
+            if not os.path.isfile(filepath):
+                logger.error(f"The file '{filepath}' does not exist!")
+                continue
+            blocks = load_file(filepath)
+            if blocks:
+                self.__send_blocks(PackageId.SEND_BLOCKS, blocks)
+            else:
+                logger.error(f"The file '{filepath}' is empty!")
 
     def full_check(self):
         """
@@ -166,6 +191,8 @@ class Client:
         return []
 
 
+# Disable too many instance attributes. The client threads are needed to shut down cleanly.
+# pylint: disable=too-many-instance-attributes
 class Server:
     """
     Class that represents a server instance. The server stores files in a BlockChain data structure
@@ -175,6 +202,7 @@ class Server:
     def __init__(self, host: str, port: int, in_memory=True):
         self.block_chain = BlockChain(in_memory=in_memory)
         self.clients = set()
+        self.client_threads = set()
 
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
         self.sock.bind((host, port))
@@ -189,19 +217,20 @@ class Server:
 
         # install package handlers for incoming packages
         self.package_handler.install(PackageId.SEND_FILE, self.handle_add_block)
+        self.package_handler.install(PackageId.SEND_BLOCKS, self.handle_add_blocks)
         self.package_handler.install(PackageId.HASH_CHECK, self.handle_check_hash)
         self.package_handler.install(PackageId.FULL_CHECK, self.handle_full_check)
         self.package_handler.install(PackageId.GET_FILE, self.handle_request_file)
 
     def __handle_client(self, sock: socket.socket, addr: Tuple):
-        logger.info("Incoming connection from: " + str(addr[0]) + ":" + str(addr[1]))
+        logger.info(f"Incoming connection from: {addr[0]}:{addr[1]}")
 
         while not self.stopped.isSet():
             if read(self.package_handler, sock):
                 break
         sock.close()
 
-        logger.info("Connection closed by: " + str(addr[0]) + ":" + str(addr[1]))
+        logger.info(f"Connection closed by: {addr[0]}:{addr[1]}")
 
     def __start(self):
         """
@@ -213,10 +242,11 @@ class Server:
         self.sock.listen()
         host = self.sock.getsockname()[0]
         port = self.sock.getsockname()[1]
-        logger.info("Server started listening to " + host + ":" + str(port))
+        logger.info(f"Server started listening to {host}:{port}")
 
         while True:
             sock, addr = self.sock.accept()
+            set_socket_options(sock)
             self.clients.add(sock)
             if self.stopped.isSet():
                 for client_sock in self.clients:
@@ -227,9 +257,15 @@ class Server:
                         pass
                 logger.info("Shutdown server...")
                 self.sock.close()
+
+                # a client may still be adding Blocks, the BlockChain is closed once all are done
+                for thread in self.client_threads:
+                    thread.join()
+                self.block_chain.close()
                 break
-            name = "Client-" + str(addr[1])
+            name = f"Client-{addr[1]}"
             thread = Thread(target=self.__handle_client, args=(sock, addr,), name=name)
+            self.client_threads.add(thread)
             thread.start()
 
         logger.info("Shutdown complete")
@@ -265,11 +301,22 @@ class Server:
 
         exists, num = self.block_chain.check_hash(hashcode)
         if exists:
-            message = "File with hash '" + hashcode + "' is stored in the BlockChain " \
-                                                      "as a total of " + str(num) + " Block(s)"
+            message = f"File with hash '{hashcode}' is stored in the BlockChain " \
+                      f"as a total of {num} Block(s)"
             return [self.package_factory.create_log_package(LogLevel.INFO, message)]
 
-        message = "File with hash '" + hashcode + "' is not stored in the BlockChain"
+        message = f"File with hash '{hashcode}' is not stored in the BlockChain"
+        return [self.package_factory.create_log_package(LogLevel.WARNING, message)]
+
+    def __invalid_block_packages(self, error: InvalidBlockError) -> [Package]:
+        """
+        Logs a Block that could not be added and creates the warning for the client.
+
+        :param error: the error raised while adding the Block.
+        :return: package to send back to the client.
+        """
+        logger.warning(f"Error while adding Blocks to the BlockChain: {error}")
+        message = f"Block(s) could not be added to the BlockChain: {error}"
         return [self.package_factory.create_log_package(LogLevel.WARNING, message)]
 
     def handle_add_block(self, block: Block) -> [Package]:
@@ -284,17 +331,49 @@ class Server:
 
         try:
             hashcode = self.block_chain.add(block)
-            logger.info("Added block with hash '" + hashcode + "' from file '" + block.filename)
+            logger.info(f"Added block with hash '{hashcode}' from file '{block.filename}'")
             res = self.block_chain.check_hash(block.hash)
             if res[0]:
-                message = "All " + str(res[1]) + " Block(s) with hash '" + hashcode \
-                          + "' from file '" + block.filename + "' were added to the Blockchain!"
+                message = f"All {res[1]} Block(s) with hash '{hashcode}' from file " \
+                          f"'{block.filename}' were added to the Blockchain!"
                 return [self.package_factory.create_log_package(LogLevel.INFO, message)]
             return []
         except DuplicateBlockError as error:
-            logger.warning("Error while adding Blocks to the BlockChain: " + str(error))
+            logger.warning(f"Error while adding Blocks to the BlockChain: {error}")
+        except InvalidBlockError as error:
+            return self.__invalid_block_packages(error)
         return []
 
+    def handle_add_blocks(self, blocks: List[Block]) -> [Package]:
+        """
+        Adding new blocks in one batch to the BlockChain.
+
+        :param blocks: the blocks to add to the BlockChain.
+        :return: packages to send back to the client.
+        """
+        try:
+            hashcodes = self.block_chain.add_many(blocks)
+        except InvalidBlockError as error:
+            return self.__invalid_block_packages(error)
+
+        duplicates = hashcodes.count(None)
+        if duplicates:
+            logger.warning(f"Error while adding Blocks to the BlockChain: {duplicates} "
+                           f"Block(s) already exist!")
+
+        # each file that got new blocks is checked once for completeness
+        files = {block.hash: block.filename for block, hashcode in zip(blocks, hashcodes)
+                 if hashcode}
+        packages = []
+        for hashcode, filename in files.items():
+            logger.info(f"Added blocks with file hash '{hashcode}' from file '{filename}'")
+            res = self.block_chain.check_hash(hashcode)
+            if res[0]:
+                message = f"All {res[1]} Block(s) with hash '{hashcode}' from file " \
+                          f"'{filename}' were added to the Blockchain!"
+                packages.append(self.package_factory.create_log_package(LogLevel.INFO, message))
+        return packages
+
     def handle_request_file(self, hashcode: str) -> [Package]:
         """
         Requests a file by its hash value. Server checks if the BlockChain contains the file and if
@@ -304,15 +383,15 @@ class Server:
         :return: package to send back to the client containing the file.
         """
 
-        logger.info("Loading data for file with hash '" + hashcode + "'")
+        logger.info(f"Loading data for file with hash '{hashcode}'")
         blocks = self.block_chain.get(hashcode)
 
         packages = []
 
         if blocks:
-            logger.info("Sending " + str(len(blocks)) + " Block(s) to the client")
+            logger.info(f"Sending {len(blocks)} Block(s) to the client")
         else:
-            message = "No Blocks found for file hash '" + hashcode + "'"
+            message = f"No Blocks found for file hash '{hashcode}'"
             return [self.package_factory.create_log_package(LogLevel.WARNING, message)]
 
         hashcode = blocks[0].hash
@@ -333,19 +412,30 @@ class Server:
         """
         valid, num_files = self.block_chain.check()
         if valid:
-            message = "All '" + str(
-                num_files) + "' file(s) stored in the blockchain are complete and consistent"
+            message = f"All '{num_files}' file(s) stored in the blockchain are complete " \
+                      f"and consistent"
             return [self.package_factory.create_log_package(LogLevel.INFO, message)]
 
         if num_files == 0:
             message = "Blockchain in an inconsistent state!"
             return [self.package_factory.create_log_package(LogLevel.ERROR, message)]
 
-        message = "Not every file in the blockchain is complete. Total files stored '" + str(
-            num_files) + "' Blockchain is consistent"
+        message = f"Not every file in the blockchain is complete. Total files stored " \
+                  f"'{num_files}' Blockchain is consistent"
         return [self.package_factory.create_log_package(LogLevel.WARNING, message)]
 
 
+def set_socket_options(sock: socket.socket):
+    """
+    Sets the options for a connected socket. Packages are sent right away instead of being
+    delayed by Nagle's algorithm and dead connections are detected by keepalive probes.
+
+    :param sock: the connected socket.
+    """
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+
 def read(package_handler: PackageHandler, sock: socket.socket) -> bool:
     """
     Reading data from given socket. Handles the incoming package by given PackageHandler
@@ -356,23 +446,45 @@ def read(package_handler: PackageHandler, sock: socket.socket) -> bool:
     :return: if client closed the connection.
     """
     try:
-        buf = sock.recv(MAX_PACKAGE_SIZE)
+        buf = receive(sock, MAX_PACKAGE_SIZE)
         if not buf:
             return True
         package_size = int.from_bytes(buf, byteorder="big")
-        byte_package = sock.recv(package_size)
+        byte_package = receive(sock, package_size)
+        if byte_package is None:
+            return True
 
         out_packages: List[Package] = package_handler.handle(byte_package)
 
         # if out packages is not empty send them back.
         if out_packages:
-            for package in out_packages:
-                send(package, sock)
+            send_all(out_packages, sock)
     except socket.error:
         return True
     return False
 
 
+def receive(sock: socket.socket, size: int) -> Optional[bytearray]:
+    """
+    Reading exactly the given number of bytes from the socket. Packages larger than a single
+    TCP segment can arrive in multiple parts, so they are received into one buffer until the
+    package is complete.
+
+    :param sock: the socket to read from.
+    :param size: the number of bytes to read.
+    :return: the received bytes. Returns None if the connection was closed.
+    """
+    data = bytearray(size)  # single buffer for the package, parts are received into it
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            return None
+        received += count
+    return data
+
+
 def send(package: Package, sock: socket.socket):
     """
     Sends a package to the given socket.
@@ -380,8 +492,23 @@ def send(package: Package, sock: socket.socket):
     :param package: the package to send.
     :param sock: the socket to write to.
     """
-    try:
-        size = len(package.raw)
-        sock.sendall(size.to_bytes(MAX_PACKAGE_SIZE, byteorder="big") + package.raw)
-    except OverflowError:
-        logger.error("Can't send package. Package size to large!")
+    send_all([package], sock)
+
+
+def send_all(packages: Iterable[Package], sock: socket.socket):
+    """
+    Sends the packages to the given socket. Each package is framed and written with its own
+    sendall call as soon as it is taken from the packages, so only a single frame is held in
+    memory and multiple packages are transferred without a round trip in between.
+
+    :param packages: the packages to send.
+    :param sock: the socket to write to.
+    """
+    for package in packages:
+        raw = package.raw
+        try:
+            header = len(raw).to_bytes(MAX_PACKAGE_SIZE, byteorder="big")
+        except OverflowError:
+            logger.error("Can't send package. Package size to large!")
+            continue
+        sock.sendall(header + raw)
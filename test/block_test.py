@@ -5,7 +5,7 @@ import random
 import unittest
 
 from parameterized import parameterized
-from data import Block
+from data import Block, encode_block, decode_block
 
 
 class BlockTest(unittest.TestCase):
@@ -22,7 +22,7 @@ class BlockTest(unittest.TestCase):
     def test_equals_and_hash(self, hashcode, ordinal, chunk, filename):
         """
         Tests the equals and hash function of a block. Everything but the hash previous should
-        be part of the equals and the hash.
+        be part of the equals. The hash leaves out the hash previous and the chunk.
         """
         block1 = Block(hashcode, ordinal, ordinal, chunk, filename)
         block2 = Block(hashcode, ordinal, ordinal, chunk, filename)
@@ -45,6 +45,28 @@ class BlockTest(unittest.TestCase):
         self.assertFalse(block1.__eq__(block3))
         self.assertNotEqual(block1.__hash__(), block3.__hash__())
 
+        # the chunk is part of the equal but not of the hash
+        block4 = Block(hashcode, ordinal, ordinal, chunk + b"\xff", filename, None)
+        self.assertFalse(block1.__eq__(block4))
+        self.assertEqual(block1.__hash__(), block4.__hash__())
+
+    @parameterized.expand([
+        ["4e37d", 3, 0, b"\x00\x01\x02", "test1", None],
+        ["60eb59", 1, 0, b"", "test2.txt", "a51c23"],
+        ["9087a2", 7, 6, bytes(range(256)), "täst3.jpg", "b22bce8"],
+    ])
+    # pylint: disable=too-many-arguments
+    def test_encode_and_decode(self, hashcode, index_all, ordinal, chunk, filename,
+                               hash_previous):
+        """
+        Tests that a block encoded to its binary layout is decoded to the same block.
+        """
+        block = Block(hashcode, index_all, ordinal, chunk, filename, hash_previous)
+        decoded = decode_block(encode_block(block))
+
+        self.assertEqual(block, decoded)
+        self.assertEqual(block.hash_previous, decoded.hash_previous)
+
 
 if __name__ == '__main__':
     unittest.main()
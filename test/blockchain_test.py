@@ -1,12 +1,24 @@
 """
 Unittests for the BlockChain class.
 """
+import os
+import tempfile
 import unittest
 from concurrent.futures.thread import ThreadPoolExecutor
 from typing import List
 
 from data import BlockChain, load_file, Block
-from exceptions import DuplicateBlockError
+from exceptions import DuplicateBlockError, IncompatibleStoreError, InvalidBlockError
+
+
+def block_path(hashcode: str) -> str:
+    """
+    Gets the path a blockchain stored in the filesystem writes the block with the given hash to.
+
+    :param hashcode: the hash the block is stored with.
+    :return: the path relative to the working directory.
+    """
+    return f".blockchain/{hashcode[:2]}/{hashcode[2:4]}/{hashcode[4:]}"
 
 
 class BlockChainTest(unittest.TestCase):
@@ -14,6 +26,26 @@ class BlockChainTest(unittest.TestCase):
     Unittests for the BlockChain class.
     """
 
+    def __change_to_temp_dir(self):
+        """
+        Changes the working directory to a new temporary directory. The previous working
+        directory is restored and the temporary directory removed after the test.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+
+    def __file_block_chain(self) -> BlockChain:
+        """
+        Creates a blockchain stored in the filesystem that is closed after the test.
+
+        :return: the blockchain.
+        """
+        block_chain = BlockChain(in_memory=False)
+        self.addCleanup(block_chain.close)
+        return block_chain
+
     def test_init(self):
         """
         Tests the instantiation of the blockchain.
@@ -67,6 +99,156 @@ class BlockChainTest(unittest.TestCase):
         self.assertEqual(block_chain.check_hash(hashcode), (True, len(blocks)))
         self.assertEqual(blocks, block_chain.get(hashcode))
 
+    def test_add_many_blocks(self):
+        """
+        Tests that multiple blocks can be added at once and existing blocks are skipped.
+        """
+        block_chain = BlockChain(in_memory=True)
+
+        blocks: List[Block] = load_file("ressources/example_image.jpg")
+        hashcode = blocks[0].hash
+
+        hashcodes = block_chain.add_many(blocks[:5] + blocks[:5])
+        self.assertNotIn(None, hashcodes[:5])
+        self.assertEqual(hashcodes[5:], [None] * 5)  # duplicates within the batch are skipped
+
+        hashcodes = block_chain.add_many(blocks)
+        self.assertEqual(hashcodes[:5], [None] * 5)  # already stored blocks are skipped
+        self.assertNotIn(None, hashcodes[5:])
+
+        # length should be len of blocks added
+        self.assertEqual(block_chain.size(), len(blocks))
+
+        # should exits and be equal
+        self.assertEqual(block_chain.check_hash(hashcode), (True, len(blocks)))
+        self.assertEqual(blocks, block_chain.get(hashcode))
+        self.assertEqual(block_chain.check(), (True, 1))
+
+    def test_add_invalid_blocks(self):
+        """
+        Tests that blocks which do not fit into the binary layout are rejected without storing
+        anything.
+        """
+        block_chain = BlockChain(in_memory=True)
+
+        with self.assertRaises(InvalidBlockError):
+            block_chain.add(Block("5fa1c3", 1, -1, b"negative", "negative.txt"))
+        with self.assertRaises(InvalidBlockError):
+            block_chain.add_many([Block("60eb59", 2, 0, b"first", "large.txt"),
+                                  Block("60eb59", 2 ** 32, 1, b"second", "large.txt")])
+
+        self.assertEqual(block_chain.size(), 0)
+        self.assertEqual(block_chain.check(), (True, 0))
+
+    def test_check_hash_after_add(self):
+        """
+        Tests that a file is checked again after a Block of the file was added.
+        """
+        block_chain = BlockChain(in_memory=True)
+
+        blocks: List[Block] = load_file("ressources/example_file.txt")
+        hashcode = blocks[0].hash
+        block_chain.add_many(blocks)
+
+        self.assertEqual(block_chain.check_hash(hashcode), (True, len(blocks)))
+        self.assertEqual(block_chain.check_hash(hashcode), (True, len(blocks)))
+
+        # a different Block with the same ordinal makes the file inconsistent
+        block_chain.add(Block(hashcode, blocks[0].index_all, 0, b"other", blocks[0].filename))
+        self.assertEqual(block_chain.check_hash(hashcode), (False, 0))
+
+    def test_check(self):
+        """
+        Tests that the full check validates every file stored in the blockchain.
+        """
+        block_chain = BlockChain(in_memory=True)
+        self.assertEqual(block_chain.check(), (True, 0))  # empty blockchain is valid
+
+        for filepath in ["ressources/example_file.txt", "ressources/example_image.jpg"]:
+            for block in load_file(filepath):
+                block_chain.add(block)
+
+        self.assertEqual(block_chain.check(), (True, 2))
+
+        # a file that is not complete is not valid
+        block_chain.add(Block("5fa1c3", 2, 0, b"partial", "partial.txt"))
+        self.assertEqual(block_chain.check(), (False, 3))
+
+    def test_file_size(self):
+        """
+        Tests that the size of a blockchain stored in the filesystem counts the stored blocks.
+        """
+        blocks: List[Block] = load_file("ressources/example_image.jpg")
+        hashcode = blocks[0].hash
+        self.__change_to_temp_dir()
+
+        block_chain = self.__file_block_chain()
+        self.assertEqual(block_chain.size(), 0)
+
+        stored = block_chain.add_many(blocks)[0]
+        self.assertEqual(block_chain.size(), len(blocks))
+
+        # a temporary file of an unfinished write is not counted
+        with open(f"{block_path(stored)}.tmp", "wb"):
+            pass
+        block_chain.close()
+
+        # stored blocks are counted when loading the blockchain again
+        block_chain = self.__file_block_chain()
+        self.assertEqual(block_chain.size(), len(blocks))
+        self.assertEqual(block_chain.check_hash(hashcode), (True, len(blocks)))
+
+    def test_file_check_lost_block(self):
+        """
+        Tests that the full check detects a lost block file, even if the block is cached.
+        """
+        blocks: List[Block] = load_file("ressources/example_file.txt")
+        self.__change_to_temp_dir()
+
+        block_chain = self.__file_block_chain()
+        stored = block_chain.add_many(blocks)[0]
+        self.assertEqual(block_chain.check(), (True, 1))
+
+        os.remove(block_path(stored))
+        self.assertFalse(block_chain.check()[0])
+
+    def test_file_check_hash_lost_block(self):
+        """
+        Tests that checking a file detects a lost block file, even if the file passed a check
+        before and the block is cached.
+        """
+        blocks: List[Block] = load_file("ressources/example_image.jpg")
+        hashcode = blocks[0].hash
+        self.__change_to_temp_dir()
+
+        block_chain = self.__file_block_chain()
+        stored = block_chain.add_many(blocks)
+        self.assertEqual(block_chain.check_hash(hashcode), (True, len(blocks)))
+
+        os.remove(block_path(stored[5]))
+        self.assertFalse(block_chain.check_hash(hashcode)[0])
+        self.assertFalse(block_chain.check()[0])
+
+    def test_file_incompatible_store(self):
+        """
+        Tests that loading a blockchain whose head can not be resolved fails with a clear error.
+        """
+        blocks: List[Block] = load_file("ressources/example_file.txt")
+        self.__change_to_temp_dir()
+
+        block_chain = self.__file_block_chain()
+        stored = block_chain.add_many(blocks)[0]
+        block_chain.close()
+
+        # a block written in another layout can not be decoded to the hash of the head
+        with open(block_path(stored), "wb") as file:
+            file.write(b"{\"hash\": \"old layout\"}")
+        self.assertRaises(IncompatibleStoreError, BlockChain, False)
+
+        # a head pointing to a block that is not stored can not be resolved either
+        os.remove(block_path(stored))
+        self.assertRaises(IncompatibleStoreError, BlockChain, False)
+
     def test_concurrent_add_same_file(self):
         """
         Tests that a file will only be added once, even if it is added concurrently from different